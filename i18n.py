@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""UI translations for CycleCountApp.
+
+Kept in a standalone module so app.py does not rebuild the string tables
+on reload, and frozen behind MappingProxyType views so nothing can
+mutate them at runtime.
+"""
+import types
+from typing import Mapping
+
+TRANSLATIONS: Mapping[str, Mapping[str, str]] = types.MappingProxyType({
+    "en": types.MappingProxyType({
+        "welcome_title": "Welcome to Warehouse Cycle Count",
+        "welcome_sub": "Loading your workspace...",
+        "continue": "Continue",
+        "language": "Language",
+        "tab_dashboard": "Live Dashboard",
+        "tab_assign": "Assignments",
+        "tab_my_assign": "My Assignments",
+        "tab_settings": "Settings",
+        "sound": "Sound (scan & submit)",
+        "vibration": "Vibration (scan & submit)",
+        "tz": "Timezone",
+        "diag": "Diagnostics",
+        "ready": "Ready",
+        "footer": "Built for speed, safety, and clarity on the warehouse floor.",
+        # Step 3 labels
+        "assign_form_title": "Create Assignment",
+        "assignee": "Assign to (name)",
+        "pallet_id": "Pallet ID",
+        "location": "Location",
+        "expected_qty": "Expected QTY",
+        "create": "Create",
+        "your_name": "Your name",
+        "select_assignment": "Select an assignment",
+        "perform_count": "Perform Count",
+        "sku": "SKU",
+        "lot": "LOT (Actual)",
+        "actual_pallet": "Actual Pallet",
+        "counted_qty": "Counted QTY",
+        "note": "Note",
+        "issue_type": "Issue Type",
+        "submit": "Submit",
+        "assigned_list": "Assigned items",
+        "lock_status": "Lock",
+        "no_assignments": "No assignments yet.",
+        "download_csv": "Download Submissions CSV",
+        "filter_by_user": "Filter by user",
+        "page": "Page",
+        "filter_by_issue": "Filter by issue type",
+        # Step 4 labels
+        "inv_upload_map": "Inventory Upload & Mapping",
+        "sheet": "Sheet",
+        "header_row": "Header row (0-based)",
+        "map_location": "Location column",
+        "map_pallet": "Pallet ID column (optional)",
+        "map_sku": "SKU column (optional)",
+        "map_lot": "LOT column (optional)",
+        "map_expected": "Expected QTY column (required)",
+        "save_mapping": "Save Mapping",
+        "mapping_saved": "Mapping saved.",
+        "discrepancies": "Discrepancies",
+        "non_match": "Non-Match Submissions",
+        "bulk_discrepancies": "Bulk Discrepancies (per-pallet only)",
+        # Step 5 labels
+        "header_title": "Warehouse Cycle Count",
+        "header_sub": "Fast - Accurate - Mobile-friendly",
+        "complete": "Complete",
+    }),
+    "es": types.MappingProxyType({
+        "welcome_title": "Bienvenido a Conteo Ciclico de Almacen",
+        "welcome_sub": "Cargando su espacio de trabajo...",
+        "continue": "Continuar",
+        "language": "Idioma",
+        "tab_dashboard": "Panel en Vivo",
+        "tab_assign": "Asignaciones",
+        "tab_my_assign": "Mis Asignaciones",
+        "tab_settings": "Configuracion",
+        "sound": "Sonido (escaneo y enviar)",
+        "vibration": "Vibracion (escaneo y enviar)",
+        "tz": "Zona horaria",
+        "diag": "Diagnostico",
+        "ready": "Listo",
+        "footer": "Hecho para velocidad, seguridad y claridad en el almacen.",
+        # Step 3 labels
+        "assign_form_title": "Crear asignacion",
+        "assignee": "Asignar a (nombre)",
+        "pallet_id": "ID de Tarima",
+        "location": "Ubicacion",
+        "expected_qty": "Cantidad Esperada",
+        "create": "Crear",
+        "your_name": "Su nombre",
+        "select_assignment": "Seleccione una asignacion",
+        "perform_count": "Realizar Conteo",
+        "sku": "SKU",
+        "lot": "LOTE (Actual)",
+        "actual_pallet": "Tarima Actual",
+        "counted_qty": "Cantidad Contada",
+        "note": "Nota",
+        "issue_type": "Tipo de Incidencia",
+        "submit": "Enviar",
+        "assigned_list": "Elementos asignados",
+        "lock_status": "Bloqueo",
+        "no_assignments": "Sin asignaciones.",
+        "download_csv": "Descargar CSV de Envios",
+        "filter_by_user": "Filtrar por usuario",
+        "page": "Pagina",
+        "filter_by_issue": "Filtrar por tipo de incidencia",
+        # Step 4 labels
+        "inv_upload_map": "Carga y Mapeo de Inventario",
+        "sheet": "Hoja",
+        "header_row": "Fila de encabezado (base 0)",
+        "map_location": "Columna de Ubicacion",
+        "map_pallet": "Columna de ID de Tarima (opcional)",
+        "map_sku": "Columna de SKU (opcional)",
+        "map_lot": "Columna de LOTE (opcional)",
+        "map_expected": "Columna de Cantidad Esperada (requerida)",
+        "save_mapping": "Guardar Mapeo",
+        "mapping_saved": "Mapeo guardado.",
+        "discrepancies": "Discrepancias",
+        "non_match": "Envios No Coincidentes",
+        "bulk_discrepancies": "Discrepancias de Bulk (por tarima)",
+        # Step 5 labels
+        "header_title": "Conteo Ciclico de Almacen",
+        "header_sub": "Rapido - Preciso - Movil",
+        "complete": "Completar",
+    }),
+})
@@ -1,79 +1,172 @@
-import os, json
-from datetime import datetime, timedelta
-from typing import Dict, List, Tuple, Optional
+import os, json, time
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, List, Set, Tuple, Optional
+
+# orjson serializes/parses several times faster than stdlib json; fall
+# back silently when it is not installed.
+try:
+    import orjson
+
+    def _dumps(obj) -> bytes:
+        return orjson.dumps(obj)
+
+    def _loads(data):
+        return orjson.loads(data)
+except ImportError:
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+    def _loads(data):
+        return json.loads(data)
 
 DATA_DIR = os.path.join(os.getcwd(), "data")
-ASSIGN_FILE = os.path.join(DATA_DIR, "assignments.json")
+ASSIGN_FILE = os.path.join(DATA_DIR, "assignments.json")   # snapshot
+LOG_FILE = os.path.join(DATA_DIR, "assignments.log")       # JSONL op log
 
 ASSIGNMENTS: Dict[str, Dict] = {}  # key: assignment_id
+# Secondary indexes so per-user/active lookups stay O(1) per hit instead
+# of scanning every assignment on each render. _BY_USER is a dict used
+# as an ordered set: the UI indexes into the per-user list positionally,
+# so it must keep creation order.
+_BY_USER: Dict[str, Dict[str, None]] = defaultdict(dict)
+_ACTIVE: Set[str] = set()
 LOCK_MINUTES = 20
 
+# Ops appended since the last snapshot; once the log has grown to the
+# size of the live state (each assignment logs at most two ops, so this
+# is reachable) we compact back into the snapshot file.
+_LOG_ENTRIES = 0
+COMPACT_MIN_ENTRIES = 64
+
+def _index_add(aid: str, a: Dict):
+    _BY_USER[a.get("user", "")][aid] = None
+    if a.get("status") == "assigned":
+        _ACTIVE.add(aid)
+
+def _rebuild_indexes():
+    _BY_USER.clear()
+    _ACTIVE.clear()
+    for aid, a in ASSIGNMENTS.items():
+        _index_add(aid, a)
+
 def _ensure():
     os.makedirs(DATA_DIR, exist_ok=True)
 
+# Timestamps are plain unix epoch floats: lock checks are a float
+# compare, and they serialize to JSON as-is.
+def _serialize(a: Dict) -> Dict:
+    vv = a.copy()
+    for dtk in ["created_at", "locked_until"]:
+        if isinstance(vv.get(dtk), datetime):
+            vv[dtk] = vv[dtk].timestamp()
+    return vv
+
+def _deserialize(v: Dict) -> Dict:
+    for dtk in ["created_at", "locked_until"]:
+        ts = v.get(dtk)
+        if isinstance(ts, str):
+            # Legacy records stored naive-UTC isoformat strings.
+            try:
+                v[dtk] = datetime.fromisoformat(ts).replace(tzinfo=timezone.utc).timestamp()
+            except ValueError:
+                v[dtk] = 0.0
+    return v
+
 def save_all():
+    """Write a full snapshot and truncate the op log (compaction)."""
+    global _LOG_ENTRIES
     _ensure()
-    serializable = {}
-    for k,v in ASSIGNMENTS.items():
-        vv = v.copy()
-        for dtk in ["created_at", "locked_until"]:
-            if dtk in vv and isinstance(vv[dtk], datetime):
-                vv[dtk] = vv[dtk].isoformat()
-        serializable[k] = vv
-    with open(ASSIGN_FILE, "w", encoding="utf-8") as f:
-        json.dump(serializable, f, ensure_ascii=False, indent=2)
+    serializable = {k: _serialize(v) for k, v in ASSIGNMENTS.items()}
+    with open(ASSIGN_FILE, "wb") as f:
+        f.write(_dumps(serializable))
+    open(LOG_FILE, "w", encoding="utf-8").close()
+    _LOG_ENTRIES = 0
+
+def _append_log(entry: Dict):
+    """O(1) append of one mutation instead of rewriting the whole file.
+
+    Compacts back into the snapshot once the log clearly outgrows the
+    live state.
+    """
+    global _LOG_ENTRIES
+    _ensure()
+    with open(LOG_FILE, "ab", buffering=65536) as f:
+        f.write(_dumps(entry) + b"\n")
+    _LOG_ENTRIES += 1
+    if _LOG_ENTRIES >= max(COMPACT_MIN_ENTRIES, len(ASSIGNMENTS)):
+        save_all()
 
 def load_all():
-    global ASSIGNMENTS
+    global ASSIGNMENTS, _LOG_ENTRIES
     _ensure()
-    if not os.path.exists(ASSIGN_FILE):
-        return
-    try:
-        with open(ASSIGN_FILE, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        for k,v in data.items():
-            if "created_at" in v and isinstance(v["created_at"], str):
-                v["created_at"] = datetime.fromisoformat(v["created_at"])
-            if "locked_until" in v and isinstance(v["locked_until"], str):
-                v["locked_until"] = datetime.fromisoformat(v["locked_until"])
-        ASSIGNMENTS = data
-    except Exception:
-        ASSIGNMENTS = {}
+    data = {}
+    if os.path.exists(ASSIGN_FILE):
+        try:
+            with open(ASSIGN_FILE, "rb") as f:
+                data = _loads(f.read())
+            for v in data.values():
+                _deserialize(v)
+        except Exception:
+            data = {}
+    # Replay mutations recorded since the last snapshot.
+    _LOG_ENTRIES = 0
+    if os.path.exists(LOG_FILE):
+        try:
+            with open(LOG_FILE, "rb") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    entry = _loads(line)
+                    if entry.get("op") == "create":
+                        data[entry["id"]] = _deserialize(entry["data"])
+                    elif entry.get("op") == "complete" and entry.get("id") in data:
+                        data[entry["id"]]["status"] = "completed"
+                    _LOG_ENTRIES += 1
+        except Exception:
+            pass
+    ASSIGNMENTS = data
+    _rebuild_indexes()
 
 def create_assignment(user: str, pallet_id: str, location: str, expected_qty: int) -> str:
-    assignment_id = f"{user}-{pallet_id}-{int(datetime.utcnow().timestamp())}"
+    now = time.time()
+    assignment_id = f"{user}-{pallet_id}-{int(now)}"
     ASSIGNMENTS[assignment_id] = {
         "user": user,
         "pallet_id": pallet_id,
         "location": location,
         "expected_qty": expected_qty,
-        "created_at": datetime.utcnow(),
-        "locked_until": datetime.utcnow() + timedelta(minutes=LOCK_MINUTES),
+        "created_at": now,
+        "locked_until": now + LOCK_MINUTES * 60,
         "status": "assigned",
         "sku": "",
         "lot": ""
     }
-    save_all()
+    _index_add(assignment_id, ASSIGNMENTS[assignment_id])
+    _append_log({"op": "create", "id": assignment_id,
+                 "data": _serialize(ASSIGNMENTS[assignment_id])})
     return assignment_id
 
 def get_user_assignment_ids(user: str) -> List[str]:
-    return [k for k,v in ASSIGNMENTS.items() if v.get("user")==user and v.get("status")=="assigned"]
+    return [k for k in _BY_USER.get(user, ()) if k in _ACTIVE]
 
 def get(aid: str) -> Optional[Dict]:
     return ASSIGNMENTS.get(aid)
 
 def get_user_assignments(user: str) -> List[Tuple[str, Dict]]:
-    return [(k,v) for k,v in ASSIGNMENTS.items() if v.get("user")==user and v.get("status")=="assigned"]
+    return [(k, ASSIGNMENTS[k]) for k in _BY_USER.get(user, ()) if k in _ACTIVE]
 
 def is_locked(assignment_id: str) -> bool:
     a = ASSIGNMENTS.get(assignment_id)
-    return bool(a and datetime.utcnow() < a["locked_until"])
+    return bool(a and time.time() < a["locked_until"])
 
 def complete(aid: str):
     a = ASSIGNMENTS.get(aid)
     if a:
         a["status"] = "completed"
-        save_all()
+        _ACTIVE.discard(aid)
+        _append_log({"op": "complete", "id": aid})
 
 # Load persisted state
 load_all()
\ No newline at end of file
@@ -1,8 +1,22 @@
+import functools
+import io
 import os
 import json
+import shutil
+import tempfile
+import time
+import numpy as np
 import pandas as pd
 from typing import Dict, Optional
 
+# calamine's Rust XLSX parser is several times faster than openpyxl's
+# Python DOM on large workbooks; keep openpyxl as the fallback.
+try:
+    import python_calamine  # noqa: F401
+    ENGINE = "calamine"
+except ImportError:
+    ENGINE = "openpyxl"
+
 DATA_DIR = os.path.join(os.getcwd(), "data")
 INV_FILE = os.path.join(DATA_DIR, "inventory.xlsx")
 MAP_FILE = os.path.join(DATA_DIR, "mapping.json")
@@ -10,42 +24,147 @@ MAP_FILE = os.path.join(DATA_DIR, "mapping.json")
 def ensure_data_dir():
     os.makedirs(DATA_DIR, exist_ok=True)
 
-def save_inventory_bytes(file_bytes: bytes) -> str:
+def save_inventory_stream(stream) -> str:
+    """Atomically persist an uploaded workbook from a readable stream.
+
+    Copies in 1 MiB chunks into a tempfile, fsyncs, then os.replace()s
+    onto INV_FILE so readers never see a torn upload and the full blob
+    is never held in memory. The mtime/size change invalidates the
+    cached loads.
+    """
     ensure_data_dir()
-    with open(INV_FILE, "wb") as f:
-        f.write(file_bytes)
+    fd, tmp = tempfile.mkstemp(dir=DATA_DIR, prefix="inv_", suffix=".xlsx")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            shutil.copyfileobj(stream, f, length=1 << 20)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, INV_FILE)
+        _FS_STATE[INV_FILE] = (time.monotonic(), True)
+    finally:
+        if os.path.exists(tmp):
+            try: os.remove(tmp)
+            except OSError: pass
     return INV_FILE
 
+def save_inventory_bytes(file_bytes: bytes) -> str:
+    """Bytes convenience wrapper over save_inventory_stream."""
+    return save_inventory_stream(io.BytesIO(file_bytes))
+
+# Existence checks hit several times per render; remember the answer
+# for a short TTL so each rerun costs at most one stat per path.
+_FS_STATE: Dict[str, tuple] = {}
+
+def _exists(path: str, ttl: float = 1.0) -> bool:
+    now = time.monotonic()
+    hit = _FS_STATE.get(path)
+    if hit is not None and now - hit[0] < ttl:
+        return hit[1]
+    result = os.path.exists(path)
+    _FS_STATE[path] = (now, result)
+    return result
+
 def has_inventory() -> bool:
-    return os.path.exists(INV_FILE)
+    return _exists(INV_FILE)
+
+@functools.lru_cache(maxsize=4)
+def _list_sheets_cached(path: str, mtime: float) -> tuple:
+    xl = pd.ExcelFile(path, engine=ENGINE)
+    return tuple(xl.sheet_names)
 
 def list_sheets() -> list:
     if not has_inventory():
         return []
     try:
-        xl = pd.ExcelFile(INV_FILE, engine="openpyxl")
-        return xl.sheet_names
+        return list(_list_sheets_cached(INV_FILE, os.path.getmtime(INV_FILE)))
     except Exception:
         return []
 
-def load_inventory_df(sheet_name: Optional[str] = None, header_row: int = 0) -> pd.DataFrame:
+def _parquet_sidecar(sheet_name: Optional[str], header_row: int) -> str:
+    tag = str(sheet_name) if sheet_name else "default"
+    safe = "".join(ch if ch.isalnum() or ch in "-_" else "_" for ch in tag)
+    return os.path.join(DATA_DIR, f"inventory.{safe}.h{header_row}.parquet")
+
+@functools.lru_cache(maxsize=8)
+def _load_inventory_cached(path: str, mtime: float, size: int, sheet_name: Optional[str], header_row: int,
+                           usecols: Optional[tuple] = None, dtype_items: Optional[tuple] = None) -> pd.DataFrame:
+    if usecols is None and dtype_items is None:
+        # Full-sheet loads go through a parquet sidecar: ~20x faster to
+        # re-read than the workbook once it has been parsed once.
+        side = _parquet_sidecar(sheet_name, header_row)
+        try:
+            if os.path.getmtime(side) >= mtime:
+                return pd.read_parquet(side)
+        except Exception:
+            pass
+        df = pd.read_excel(path, engine=ENGINE, sheet_name=sheet_name, header=header_row)
+        try:
+            df.to_parquet(side, index=False)
+        except Exception:
+            pass
+        return df
+    dtype = dict(dtype_items) if dtype_items else None
+    df = pd.read_excel(path, engine=ENGINE, sheet_name=sheet_name, header=header_row,
+                       usecols=list(usecols) if usecols else None, dtype=dtype)
+    if dtype:
+        # Lookup columns (requested as string dtype) are normalised once
+        # here: arrow-backed storage keeps strip/compare bytewise instead
+        # of per-row Python objects, and pre-stripping means downstream
+        # index builds and probes never re-strip the column.
+        for col, dt in dtype.items():
+            if dt in ("string", str) and col in df.columns:
+                try:
+                    df[col] = df[col].astype("string[pyarrow]").str.strip()
+                except (ImportError, TypeError):
+                    df[col] = df[col].astype("string").str.strip()
+    return df
+
+def load_inventory_df(sheet_name: Optional[str] = None, header_row: int = 0,
+                      usecols=None, dtype: Optional[Dict] = None) -> pd.DataFrame:
+    """Load the saved inventory sheet, cached per (file mtime+size, sheet, header).
+
+    Repeat lookups during a count session skip the Excel parse entirely;
+    a fresh upload changes the mtime and so invalidates the cache. Pass
+    usecols/dtype (e.g. the mapped columns) to materialise only what the
+    caller needs. The returned DataFrame is shared -- treat it as
+    read-only.
+    """
     if not has_inventory():
         return pd.DataFrame()
     try:
-        return pd.read_excel(INV_FILE, engine="openpyxl", sheet_name=sheet_name, header=header_row)
+        st = os.stat(INV_FILE)
+        return _load_inventory_cached(
+            INV_FILE, st.st_mtime, st.st_size, sheet_name, header_row,
+            tuple(usecols) if usecols else None,
+            tuple(sorted(dtype.items())) if dtype else None)
     except Exception:
         return pd.DataFrame()
 
+# (mtime, dict) of the last load; the mapping is read far more often
+# than it changes, so most calls are a stat + compare.
+_MAP_CACHE = None
+
 def save_mapping(mapping: Dict):
+    global _MAP_CACHE
     ensure_data_dir()
-    with open(MAP_FILE, "w", encoding="utf-8") as f:
+    tmp = MAP_FILE + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
         json.dump(mapping, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, MAP_FILE)
+    _MAP_CACHE = (os.path.getmtime(MAP_FILE), dict(mapping))
 
 def load_mapping() -> Dict:
-    if os.path.exists(MAP_FILE):
-        with open(MAP_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
-    return {}
+    global _MAP_CACHE
+    try:
+        mtime = os.path.getmtime(MAP_FILE)
+    except OSError:
+        return {}
+    if _MAP_CACHE is not None and _MAP_CACHE[0] == mtime:
+        return _MAP_CACHE[1]
+    with open(MAP_FILE, "r", encoding="utf-8") as f:
+        mapping = json.load(f)
+    _MAP_CACHE = (mtime, mapping)
+    return mapping
 
 def _to_int(val):
     try:
@@ -56,6 +175,48 @@ def _to_int(val):
         except Exception:
             return None
 
+_INDEX_KEYS = ("pallet_col", "location_col", "sku_col", "lot_col")
+
+# Strategy ladder, most to least specific. Module-level so lookups do
+# not rebuild the nested literal per call.
+_STRATEGIES = (
+    ("pallet_col", "location_col"),
+    ("pallet_col",),
+    ("location_col",),
+    ("sku_col", "lot_col"),
+    ("sku_col",),
+)
+
+def build_lookup_index(df: pd.DataFrame, mapping: Dict) -> Dict:
+    """{column: {stripped value: array of row positions}} for the mapped columns.
+
+    One vectorized strip+groupby pass per column replaces the full-column
+    equality scan that get_expected_qty used to run per lookup.
+    """
+    index = {}
+    for key in _INDEX_KEYS:
+        col = mapping.get(key)
+        if col and col in df.columns:
+            s = df[col]
+            if not pd.api.types.is_string_dtype(s):
+                s = s.astype(str)
+            s = s.str.strip()
+            s.index = pd.RangeIndex(len(s))  # labels == row positions
+            index[col] = {str(k): v for k, v in s.groupby(s).indices.items()}
+    return index
+
+def _get_lookup_index(df: pd.DataFrame, mapping: Dict) -> Dict:
+    # Cached on the frame itself (df.attrs), so the shared cached
+    # DataFrame carries its index across calls and cache keys stay in
+    # one place. Rebuilt if the mapping's columns change.
+    cols = tuple(mapping.get(k) for k in _INDEX_KEYS)
+    if df.attrs.get("_lookup_index_cols") == cols:
+        return df.attrs["_lookup_index"]
+    index = build_lookup_index(df, mapping)
+    df.attrs["_lookup_index"] = index
+    df.attrs["_lookup_index_cols"] = cols
+    return index
+
 def get_expected_qty(df: pd.DataFrame, mapping: Dict, lookup: Dict) -> Optional[int]:
     """
     mapping keys:
@@ -65,37 +226,140 @@ def get_expected_qty(df: pd.DataFrame, mapping: Dict, lookup: Dict) -> Optional[
     lookup keys must correspond to *_col names above (values are the lookup values)
     Try strategies in order of specificity:
       (pallet+location) -> pallet -> location -> (sku+lot) -> sku
+    Lookups are hash probes into a prebuilt per-column index; multi-field
+    strategies intersect the row-position arrays.
     """
     try:
         if df is None or df.empty or not mapping or not mapping.get("expected_col"):
             return None
         m = mapping
-        def filt(d, fkey):
+        index = _get_lookup_index(df, m)
+
+        # Resolve each field to its row-position array (or None) exactly
+        # once; the strategy walk below is then pure dict reads with no
+        # per-call closures.
+        resolved = {}
+        for fkey in _INDEX_KEYS:
             col = m.get(fkey)
             val = lookup.get(fkey)
-            if not col or col not in d.columns or val in (None, ""):
-                return None
-            return d[d[col].astype(str).str.strip() == str(val).strip()]
-
-        strategies = [
-            ["pallet_col","location_col"],
-            ["pallet_col"],
-            ["location_col"],
-            ["sku_col","lot_col"],
-            ["sku_col"]
-        ]
-        for fields in strategies:
-            sub = df
+            if not col or col not in index or val in (None, ""):
+                resolved[fkey] = None
+            else:
+                resolved[fkey] = index[col].get(str(val).strip())
+
+        expected = df[m["expected_col"]]
+        # Fast path: pallet IDs are almost always unique, and with a
+        # single pallet hit every more specific strategy resolves to
+        # that same row (or misses and falls back to it), so return it
+        # without walking the strategy ladder.
+        pal_rows = resolved["pallet_col"]
+        if pal_rows is not None and len(pal_rows) == 1:
+            return _to_int(expected.iat[int(pal_rows[0])])
+
+        for fields in _STRATEGIES:
+            rows = None
             ok = True
             for f in fields:
-                res = filt(sub, f)
-                if res is None:
+                r = resolved[f]
+                if r is None:
                     ok = False
                     break
-                sub = res
-            if ok and sub is not None and not sub.empty:
-                val = sub[m["expected_col"]].iloc[0]
-                return _to_int(val)
+                rows = r if rows is None else np.intersect1d(rows, r, assume_unique=True)
+            if ok and rows is not None and len(rows):
+                # positions are ascending, so [0] matches the old
+                # first-row-in-file-order behaviour.
+                return _to_int(expected.iat[int(rows[0])])
+        return None
+    except Exception:
         return None
+def _get_pair_index(df: pd.DataFrame, mapping: Dict) -> Optional[Dict]:
+    """'pallet|location' -> first row position, cached on the frame.
+
+    A joined-key dict gives the batch path a straight hash probe per
+    lookup for its dominant strategy, skipping the merge machinery.
+    """
+    pal_col = mapping.get("pallet_col")
+    loc_col = mapping.get("location_col")
+    cols = (pal_col, loc_col)
+    if not (pal_col and loc_col and pal_col in df.columns and loc_col in df.columns):
+        return None
+    if df.attrs.get("_pair_index_cols") == cols:
+        return df.attrs["_pair_index"]
+    pal = df[pal_col].astype(str).str.strip()
+    loc = df[loc_col].astype(str).str.strip()
+    pair: Dict[str, int] = {}
+    for pos, key in enumerate((pal + "|" + loc).tolist()):
+        if key not in pair:
+            pair[key] = pos
+    df.attrs["_pair_index"] = pair
+    df.attrs["_pair_index_cols"] = cols
+    return pair
+
+def get_expected_qty_batch(df: pd.DataFrame, mapping: Dict, lookups) -> list:
+    """Resolve expected qty for many lookups in one pass per strategy.
+
+    Same strategy order and first-match semantics as get_expected_qty,
+    but each strategy is one merge against a de-duplicated key frame
+    instead of a scan per lookup. Returns ints (or None) in input order.
+    """
+    lookups = list(lookups)
+    if not lookups:
+        return []
+    try:
+        if df is None or df.empty or not mapping or not mapping.get("expected_col"):
+            return [None] * len(lookups)
+        m = mapping
+        exp_col = m["expected_col"]
+        lk = pd.DataFrame(lookups).reindex(columns=list(_INDEX_KEYS))
+        for f in _INDEX_KEYS:
+            lk[f] = lk[f].fillna("").astype(str).str.strip()
+        result = [None] * len(lk)
+        unresolved = np.ones(len(lk), dtype=bool)
+        # Hash-join fast path for the dominant pallet+location strategy:
+        # one dict probe per lookup against the cached joined-key index.
+        pair = _get_pair_index(df, m)
+        if pair is not None:
+            expected = df[exp_col]
+            pals = lk["pallet_col"].to_numpy()
+            locs = lk["location_col"].to_numpy()
+            for i in range(len(lk)):
+                if pals[i] and locs[i]:
+                    pos = pair.get(pals[i] + "|" + locs[i])
+                    if pos is not None:
+                        # A key match consumes the lookup even when the
+                        # matched expected qty is blank (-> None), same
+                        # as the scalar path; falling through would
+                        # return a qty from an unrelated weaker match.
+                        result[i] = _to_int(expected.iat[pos])
+                        unresolved[i] = False
+        if not unresolved.any():
+            return result
+        for fields in _STRATEGIES:
+            fields = list(fields)
+            cols = [m.get(f) for f in fields]
+            if not all(c and c in df.columns for c in cols):
+                continue
+            take = unresolved & lk[fields].ne("").all(axis=1).to_numpy()
+            if not take.any():
+                continue
+            left = lk.loc[take, fields]
+            right = df[[*cols, exp_col]].copy()
+            for f, c in zip(fields, cols):
+                right[f] = right[c].astype(str).str.strip()
+            # keep="first" preserves the first-row-in-file-order match.
+            right = right.drop_duplicates(subset=fields, keep="first")[fields + [exp_col]]
+            # indicator distinguishes "no key match" (fall through to
+            # the next strategy) from "matched a row with a blank
+            # expected qty" (resolved to None, consume the lookup).
+            merged = left.merge(right, on=fields, how="left", indicator=True)
+            vals = merged[exp_col].to_numpy()
+            hits = (merged["_merge"] == "both").to_numpy()
+            for pos, val, hit in zip(np.flatnonzero(take), vals, hits):
+                if hit:
+                    result[pos] = _to_int(val)
+                    unresolved[pos] = False
+            if not unresolved.any():
+                break
+        return result
     except Exception:
-        return None
\ No newline at end of file
+        return [None] * len(lookups)
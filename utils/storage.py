@@ -1,24 +1,59 @@
-import os
+import atexit
 import csv
+import hashlib
+import os
+import re
 import tempfile
-from typing import List, Dict
+import threading
+from typing import List, Dict, Optional, Tuple
+
+import pandas as pd
 
 DATA_DIR = os.path.join(os.getcwd(), "data")
 SUBMISSIONS_FILE = os.path.join(DATA_DIR, "submissions.csv")
+# Columnar mirror of the CSV, refreshed lazily; analytics reads prefer it.
+PARQUET_FILE = os.path.join(DATA_DIR, "submissions.parquet")
 
 REQUIRED_FIELDS = [
     "timestamp","user","location","sku","lot",
     "expected_qty","counted_qty","issue_type","actual_pallet","note"
 ]
 
+_QTY_COLS = ("expected_qty", "counted_qty")
+# Explicit dtypes let read_csv skip its type-inference pass.
+_CSV_DTYPES = {c: str for c in REQUIRED_FIELDS if c not in _QTY_COLS}
+
+# The schema check is settled once per process (and remembered across
+# processes via a sidecar holding the field-list hash), so the hot
+# append/read paths don't re-open the CSV header every call.
+SCHEMA_SENTINEL = os.path.join(DATA_DIR, ".schema_v")
+_SCHEMA_HASH = hashlib.sha1(",".join(REQUIRED_FIELDS).encode("utf-8")).hexdigest()
+_SCHEMA_OK = False
+
 def ensure_data_dir():
+    global _SCHEMA_OK
+    if _SCHEMA_OK:
+        return
     os.makedirs(DATA_DIR, exist_ok=True)
-    if not os.path.exists(SUBMISSIONS_FILE):
+    if os.path.exists(SUBMISSIONS_FILE):
+        try:
+            with open(SCHEMA_SENTINEL, "r", encoding="utf-8") as f:
+                if f.read().strip() == _SCHEMA_HASH:
+                    _SCHEMA_OK = True
+                    return
+        except OSError:
+            pass
+        _migrate_columns_if_needed()
+    else:
         with open(SUBMISSIONS_FILE, "w", newline="", encoding="utf-8") as f:
             writer = csv.writer(f)
             writer.writerow(REQUIRED_FIELDS)
-    else:
-        _migrate_columns_if_needed()
+    try:
+        with open(SCHEMA_SENTINEL, "w", encoding="utf-8") as f:
+            f.write(_SCHEMA_HASH)
+    except OSError:
+        pass
+    _SCHEMA_OK = True
 
 def _read_header(path: str):
     try:
@@ -61,23 +96,185 @@ def _migrate_columns_if_needed():
             for r in rows:
                 out = {k: r.get(k, "") for k in REQUIRED_FIELDS}
                 writer.writerow(out)
-        # Atomic replace
+        # Atomic replace; any held append handle now points at the old
+        # inode, so drop it and let the next append reopen.
         os.replace(tmp, SUBMISSIONS_FILE)
+        _close_append_handle()
     finally:
         if os.path.exists(tmp):
             try: os.remove(tmp)
             except Exception: pass
 
+# Long-lived O_APPEND descriptor: the kernel serialises appends
+# atomically (a submission line is well under PIPE_BUF), and each flush
+# is a single os.write with no open/close or path lookup. fsync per
+# flush is opt-in (durability vs. IO throughput tradeoff).
+_FD = None
+_FD_LOCK = threading.Lock()
+FSYNC_ON_APPEND = os.getenv("CC_FSYNC_APPENDS", "0") == "1"
+
+def _append_fd() -> int:
+    global _FD, _SCHEMA_OK
+    if _FD is None:
+        if not os.path.exists(SUBMISSIONS_FILE):
+            # The CSV was rotated away since bootstrap; drop the schema
+            # flag so ensure_data_dir recreates the file with its header
+            # line instead of O_CREAT producing a headerless file.
+            _SCHEMA_OK = False
+        ensure_data_dir()
+        _FD = os.open(SUBMISSIONS_FILE, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    return _FD
+
+def _reopen_if_rotated():
+    # Compare inodes so a rotated/replaced file gets a fresh descriptor
+    # instead of appends landing in the old, unlinked inode.
+    global _FD
+    if _FD is None:
+        return
+    try:
+        if os.fstat(_FD).st_ino == os.stat(SUBMISSIONS_FILE).st_ino:
+            return
+    except OSError:
+        pass
+    try:
+        os.close(_FD)
+    except OSError:
+        pass
+    _FD = None
+
+def _close_append_handle():
+    global _FD
+    with _FD_LOCK:
+        if _FD is not None:
+            try:
+                os.close(_FD)
+            except OSError:
+                pass
+            _FD = None
+
+# Pending rows are batched in memory and serialised in one write: one
+# syscall per flush instead of per submit. Readers flush first, and
+# atexit drains whatever is left.
+_WRITE_BUF: List[Dict[str, str]] = []
+_WRITE_BUF_BYTES = 0
+_AUTO_FLUSH_BYTES = 64 * 1024
+
 def append_submission(row: Dict[str,str]):
-    ensure_data_dir()
+    global _WRITE_BUF_BYTES
     # Guarantee all required fields are present
     out = {k: row.get(k, "") for k in REQUIRED_FIELDS}
-    with open(SUBMISSIONS_FILE, "a", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=REQUIRED_FIELDS)
-        writer.writerow(out)
+    # Streamlit serves each session on its own thread, so the buffer is
+    # shared mutable state: mutate it only under the lock, or a row
+    # appended mid-flush gets clear()ed away unwritten.
+    with _FD_LOCK:
+        _WRITE_BUF.append(out)
+        _WRITE_BUF_BYTES += sum(len(v) for v in out.values()) + 2 * len(out)
+        if _WRITE_BUF_BYTES >= _AUTO_FLUSH_BYTES:
+            _flush_locked()
+
+# Only quote fields that need it; '"' escapes as '""' per RFC 4180.
+_needs_quote_re = re.compile(r'[",\n\r]')
+
+def _fast_csv_row(row: Dict[str, str]) -> str:
+    """One submission row as a CSV line, without csv.writer state.
+
+    Matches what DictWriter emits for these rows (\\r\\n terminator,
+    minimal quoting) but is a plain lookup+join per field.
+    """
+    parts = []
+    for k in REQUIRED_FIELDS:
+        v = str(row.get(k, ""))
+        if _needs_quote_re.search(v):
+            v = '"' + v.replace('"', '""') + '"'
+        parts.append(v)
+    return ",".join(parts) + "\r\n"
+
+def _flush_locked():
+    # Caller holds _FD_LOCK.
+    global _WRITE_BUF_BYTES
+    if not _WRITE_BUF:
+        return
+    data = "".join(_fast_csv_row(r) for r in _WRITE_BUF).encode("utf-8")
+    _reopen_if_rotated()
+    fd = _append_fd()
+    os.write(fd, data)
+    if FSYNC_ON_APPEND:
+        os.fsync(fd)
+    _WRITE_BUF.clear()
+    _WRITE_BUF_BYTES = 0
+
+def flush_submissions():
+    """Serialise all pending rows and write them in a single os.write."""
+    with _FD_LOCK:
+        _flush_locked()
+
+atexit.register(flush_submissions)
 
 def read_submissions() -> List[Dict[str,str]]:
+    """Legacy row-dict view; values carry the loader's dtypes.
+
+    Prefer read_submissions_df() -- this exists only for callers that
+    still want one dict per row.
+    """
+    return read_submissions_df().to_dict("records")
+
+# (st_mtime_ns, st_size) of the CSV the mirror was last built from. An
+# mtime-only comparison can call the mirror fresh when a flush lands in
+# the same filesystem-timestamp tick as the mirror write, hiding the
+# just-flushed rows from every read until the next append.
+_MIRROR_SRC: Optional[Tuple[int, int]] = None
+
+def _parquet_fresh() -> bool:
+    try:
+        src = os.stat(SUBMISSIONS_FILE)
+    except OSError:
+        return False
+    if _MIRROR_SRC is not None:
+        return _MIRROR_SRC == (src.st_mtime_ns, src.st_size)
+    try:
+        # Mirror left by an earlier process: strict > is the safe
+        # direction -- an equal mtime just costs one CSV reparse.
+        return os.path.getmtime(PARQUET_FILE) > src.st_mtime
+    except OSError:
+        return False
+
+def read_submissions_df() -> pd.DataFrame:
+    """Submissions as a DataFrame for analytics.
+
+    The CSV stays the durable append-only log; this reads a parquet
+    mirror when it is still current (a columnar read is ~10x faster than
+    re-parsing CSV) and refreshes the mirror after an append has made it
+    stale. Falls back to plain CSV when pyarrow is unavailable.
+    """
+    global _MIRROR_SRC
     ensure_data_dir()
-    with open(SUBMISSIONS_FILE, "r", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        return list(reader)
\ No newline at end of file
+    flush_submissions()
+    if _parquet_fresh():
+        try:
+            return pd.read_parquet(PARQUET_FILE)
+        except Exception:
+            pass
+    try:
+        src = os.stat(SUBMISSIONS_FILE)
+    except OSError:
+        src = None
+    try:
+        # pyarrow parses the CSV in C and multi-threaded; fall back to
+        # the default engine when it is unavailable.
+        df = pd.read_csv(SUBMISSIONS_FILE, dtype=_CSV_DTYPES,
+                         keep_default_na=False, engine="pyarrow")
+    except (ImportError, ValueError, TypeError):
+        df = pd.read_csv(SUBMISSIONS_FILE, dtype=_CSV_DTYPES, keep_default_na=False)
+    for col in _QTY_COLS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors="coerce").astype("Int64")
+    try:
+        df.to_parquet(PARQUET_FILE, index=False)
+        _MIRROR_SRC = (src.st_mtime_ns, src.st_size) if src else None
+    except Exception:
+        _MIRROR_SRC = None
+    return df
+# Bootstrap once at import (same pattern as utils.assignments.load_all):
+# after this, ensure_data_dir on the hot append/read paths is a single
+# boolean check.
+ensure_data_dir()